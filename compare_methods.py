@@ -14,7 +14,7 @@ from dct import (dct_loeffler_1d, idct_loeffler_1d,
                  dct_2d, idct_2d)
 from pipeline import process_channel, rgb_to_ycbcr, ycbcr_to_rgb
 from constantes import Q50_LUMA, Q50_CHROMA
-from plots import quality_metrics
+from metrics import quality_metrics, compute_bitrate
 
 INPUT_DIR = 'src_py/imgs'
 OUTPUT_DIR = 'comparison_results'
@@ -36,12 +36,15 @@ METHODS = {
 
 # }
 
-def process_image_with_method(img_path, method_name, dct_func, idct_func):
-    """Process a single image with a specific DCT method"""
+def load_image(img_path):
+    """Load an image once and convert it to YCbCr (shared by all methods)"""
     img = Image.open(img_path).convert('RGB')
-    arr = np.array(img).astype(np.uint8)
-    r, g, b = arr[:,:,0], arr[:,:,1], arr[:,:,2]
-    y, cb, cr = rgb_to_ycbcr(r, g, b)
+    arr = np.array(img)  # RGB mode is already uint8
+    return arr, rgb_to_ycbcr(arr)
+
+def process_image_with_method(arr, ycc, method_name, dct_func, idct_func):
+    """Process a single (already loaded) image with a specific DCT method"""
+    y, cb, cr = ycc
     
     results = []
     for k in K_FACTORS:
@@ -57,7 +60,6 @@ def process_image_with_method(img_path, method_name, dct_func, idct_func):
         time_ms = (t1 - t0) * 1000.0
         
         # Calculate bitrate for all 3 channels (média)
-        from plots import compute_bitrate
         bitrate_y = compute_bitrate(quant_y)
         bitrate_cb = compute_bitrate(quant_cb)
         bitrate_cr = compute_bitrate(quant_cr)
@@ -94,10 +96,11 @@ def compare_all_methods():
         img_path = os.path.join(INPUT_DIR, img_file)
         print(f"\nProcessing: {img_file}")
         print("-"*70)
+        arr, ycc = load_image(img_path)
         
         for method_name, (dct_func, idct_func) in METHODS.items():
             print(f"  Running {method_name} method...", end=' ')
-            results = process_image_with_method(img_path, method_name, dct_func, idct_func)
+            results = process_image_with_method(arr, ycc, method_name, dct_func, idct_func)
             all_results.extend(results)
             avg_time = np.mean([r['time_ms'] for r in results])
             print(f"Done (avg time: {avg_time:.2f} ms)")
@@ -168,9 +168,10 @@ class LibImage:
         nb = y_quantized.shape[0]
 
         # Keep numpy arrays alive while C accesses their data
-        y_flat  = np.ascontiguousarray(y_quantized.flatten(),  dtype=np.int32)
-        cb_flat = np.ascontiguousarray(cb_quantized.flatten(), dtype=np.int32)
-        cr_flat = np.ascontiguousarray(cr_quantized.flatten(), dtype=np.int32)
+        # (contiguous int32 input is passed through without a copy)
+        y_flat  = np.ascontiguousarray(y_quantized,  dtype=np.int32).reshape(-1)
+        cb_flat = np.ascontiguousarray(cb_quantized, dtype=np.int32).reshape(-1)
+        cr_flat = np.ascontiguousarray(cr_quantized, dtype=np.int32).reshape(-1)
 
         comp = _JpegCompressed()
         comp.width = width
@@ -234,7 +235,9 @@ class LibImage:
         """
         method_enum = self._resolve_method(dct_method)
 
-        rgb_flat = np.ascontiguousarray(rgb_data.flatten(), dtype=np.uint8)
+        # Contiguous uint8 input (e.g. np.array(PIL image)) is used in place,
+        # so repeated calls on the same image (k sweeps) copy nothing
+        rgb_flat = np.ascontiguousarray(rgb_data, dtype=np.uint8).reshape(-1)
 
         img = _JpegImage()
         img.width = width
@@ -71,20 +71,12 @@ def calc_psnr(orig: np.ndarray, recon: np.ndarray) -> float:
 
 def calc_bitrate(y_q: np.ndarray, cb_q: np.ndarray, cr_q: np.ndarray) -> float:
     """Estimate bitrate (bpp) using last non-zero zigzag position."""
-    total_bits = 0.0
-    total_blocks = 0
-    for channel_blocks in [y_q, cb_q, cr_q]:
-        for b in range(channel_blocks.shape[0]):
-            block = channel_blocks[b]
-            last_nz = -1
-            for i in range(63, -1, -1):
-                if block[ZIGZAG_SCAN[i]] != 0:
-                    last_nz = i
-                    break
-            if last_nz >= 0:
-                total_bits += (last_nz + 1) * 8.0
-            total_blocks += 1
-    total_pixels = total_blocks * 64
+    blocks = np.concatenate([np.reshape(q, (-1, 64)) for q in (y_q, cb_q, cr_q)])
+    # (N, 64) nonzero mask in zigzag order; last nonzero = first hit from the end
+    nz = blocks[:, ZIGZAG_SCAN] != 0
+    last_nz = 63 - np.argmax(nz[:, ::-1], axis=1)
+    total_bits = float(np.sum(last_nz[nz.any(axis=1)] + 1)) * 8.0
+    total_pixels = blocks.shape[0] * 64
     return total_bits / total_pixels if total_pixels > 0 else 0.0
 
 
@@ -138,11 +130,11 @@ def fetch_compressed(base_url: str, method: str, quality: float, timeout: int =
 
     # Unpack int16 → int32 (libimage expects int32 arrays)
     off = 0
-    y_q  = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    y_q  = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
     off += ch_size_16
-    cb_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    cb_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
     off += ch_size_16
-    cr_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    cr_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
 
     return {
         "width": w, "height": h, "method": m, "quality": q,
@@ -292,11 +284,11 @@ def send_image_compressed(base_url: str, rgb: np.ndarray,
     ch_size_16 = nb * 64 * 2
 
     off = 0
-    y_q  = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    y_q  = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
     off += ch_size_16
-    cb_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    cb_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
     off += ch_size_16
-    cr_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64).copy()
+    cr_q = np.frombuffer(data[off:off+ch_size_16], dtype=np.int16).astype(np.int32).reshape(nb, 64)
 
     return {
         "width": w2, "height": h2, "method": m, "quality": q,
@@ -42,6 +42,27 @@ MATRIX_COS = np.array([
 
 MATRIX_NORM = np.array([MATRIX_NORM_0] + [MATRIX_NORM_K]*7, dtype=np.int64)
 
+# Formas pré-calculadas para os produtos em lote (contíguas, sem transpor por chamada)
+MATRIX_COS_T = np.ascontiguousarray(MATRIX_COS.T)
+MATRIX_NORM_COL = MATRIX_NORM[:, None]
+
+# ============ Approximate DCT (dct_approx.c) — Cintra-Bayer 2011 ============
+
+# Matriz T: só 0 / ±1 (apenas somas)
+T_APPROX = np.array([
+    [1,  1,  1,  1,  1,  1,  1,  1],
+    [1,  1,  1,  0,  0, -1, -1, -1],
+    [1,  0,  0, -1, -1,  0,  0,  1],
+    [1,  0, -1, -1,  1,  1,  0, -1],
+    [1, -1, -1,  1,  1, -1, -1,  1],
+    [1, -1,  0,  1, -1,  0,  1, -1],
+    [0, -1,  1,  0,  0,  1, -1,  0],
+    [0, -1,  1, -1,  1, -1,  1,  0],
+], dtype=np.int64)
+
+# Inversa: T^T * diag(24 / ||linha_k||^2) / 24, com norm^2 = {8, 6, 4, 6, 8, 6, 4, 6}
+APPROX_IDCT_SCALE = np.array([3, 4, 6, 4, 3, 4, 6, 4], dtype=np.int64)
+
 # ============ Standard JPEG quantization tables Q=50 (quantization.c) ============
 
 Q50_LUMA = np.array([
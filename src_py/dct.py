@@ -9,12 +9,16 @@ Arquivos C de referência:
     - dct_matrix.c      (64 multiplicações, matriz de cossenos)
     - dct_approx.c      (0 multiplicações, Cintra-Bayer 2011)
     - dct_identity.c    (pass-through)
+
+As versões *_2d_batch operam sobre todos os blocos (N, 8, 8) de uma vez,
+com a mesma aritmética inteira (int64) e o mesmo arredondamento do C.
 """
 
 import numpy as np
 from constantes import (
     TYPE, C1, S1, C3, S3, C6, S6, SQRT_2, SCALE_CONST,
-    MATRIX_COS, MATRIX_NORM, MATRIX_SCALE_SQ,
+    MATRIX_COS, MATRIX_COS_T, MATRIX_NORM, MATRIX_NORM_COL, MATRIX_SCALE_SQ,
+    T_APPROX, APPROX_IDCT_SCALE,
 )
 
 
@@ -22,64 +26,81 @@ from constantes import (
 #  Helpers: C-style integer arithmetic
 # =====================================================================
 
-def _c_div(a, b):
-    """C-style integer division: truncation toward zero (b > 0 assumed)."""
-    if a >= 0:
-        return a // b
-    else:
-        return -((-a) // b)
+def _c_div_i64(a, b):
+    """C-style integer division: truncation toward zero (b > 0).
+
+    The input must be an int64 array (the sign mask is a >> 63) and the
+    result stays int64. pipeline._c_div_vec is the dtype-generic variant
+    that returns int32 for the colorspace code.
+    """
+    # Bias negatives by (b - 1) so floor division truncates; no branches
+    t = (a >> 63) & (b - 1)
+    t += a
+    t //= b
+    return t
 
 
-def _div_round(num, den):
-    """Signed rounding division matching C's div_round (den > 0)."""
-    if num >= 0:
-        return (num + den // 2) // den
-    else:
-        return -((-num + den // 2) // den)
+def _div_round_vec(num, den):
+    """Signed rounding division matching C's div_round, over int64 arrays (den > 0)."""
+    # One division on |num|, sign restored after (both C branches in one pass)
+    q = (np.abs(num) + den // 2) // den
+    return np.where(num < 0, -q, q)
 
 
 # =====================================================================
 #  Loeffler DCT / IDCT  (dct_loeffler.c)
 # =====================================================================
 
-def dct_loeffler_1d(x):
-    """Forward 1D DCT — Loeffler, matching C's dct_1d_stride exactly."""
-    v = [int(xi) for xi in np.asarray(x, dtype=np.int64).flatten()]
+# div_round denominators / scale factors, computed once. Each output keeps
+# its own division by a Python int: NumPy's scalar-divisor path is much faster
+# than dividing a whole block by a per-column denominator array.
+_DEN_SQRT2_2 = SQRT_2 * 2
+_DEN_SC_2 = SCALE_CONST * 2
+_DEN_SC_8 = SCALE_CONST * 8
+
+
+def dct_loeffler_1d_fast(v):
+    """Forward Loeffler DCT on the last axis of an int64 (..., 8) array.
+
+    Specialized kernel for the batched path: no dtype/shape dispatch, any
+    number of vectors per call. Same arithmetic as C's dct_1d_stride.
+    """
+    assert v.dtype == np.int64 and v.shape[-1] == 8
 
-    s07 = v[0] + v[7]; d07 = v[0] - v[7]
-    s16 = v[1] + v[6]; d16 = v[1] - v[6]
-    s25 = v[2] + v[5]; d25 = v[2] - v[5]
-    s34 = v[3] + v[4]; d34 = v[3] - v[4]
+    s07 = v[..., 0] + v[..., 7]; d07 = v[..., 0] - v[..., 7]
+    s16 = v[..., 1] + v[..., 6]; d16 = v[..., 1] - v[..., 6]
+    s25 = v[..., 2] + v[..., 5]; d25 = v[..., 2] - v[..., 5]
+    s34 = v[..., 3] + v[..., 4]; d34 = v[..., 3] - v[..., 4]
 
     e0 = s07 + s34; e3 = s07 - s34
     e1 = s16 + s25; e2 = s16 - s25
     o0 = d07 + d34; o1 = d16 + d25; o2 = d16 - d25; o3 = d07 - d34
 
-    out = [0] * 8
-    out[0] = _div_round((e0 + e1) * SCALE_CONST, SQRT_2 * 2)
-    out[4] = _div_round((e0 - e1) * SCALE_CONST, SQRT_2 * 2)
-    out[2] = _div_round(C6 * e2 + S6 * e3,       SCALE_CONST * 2)
-    out[6] = _div_round(-S6 * e2 + C6 * e3,      SCALE_CONST * 2)
-    out[1] = _div_round(C3*o0 + C1*o1 + S1*o2 + S3*o3, SQRT_2 * 2)
-    out[3] = _div_round(S1*o0 - C3*o1 + S3*o2 + C1*o3, SQRT_2 * 2)
-    out[5] = _div_round(C1*o0 - S3*o1 - C3*o2 - S1*o3, SQRT_2 * 2)
-    out[7] = _div_round(-S3*o0 + S1*o1 - C1*o2 + C3*o3, SQRT_2 * 2)
+    out = np.empty(v.shape, dtype=np.int64)
+    out[..., 0] = _div_round_vec((e0 + e1) * SCALE_CONST, _DEN_SQRT2_2)
+    out[..., 4] = _div_round_vec((e0 - e1) * SCALE_CONST, _DEN_SQRT2_2)
+    out[..., 2] = _div_round_vec(C6 * e2 + S6 * e3,       _DEN_SC_2)
+    out[..., 6] = _div_round_vec(-S6 * e2 + C6 * e3,      _DEN_SC_2)
+    out[..., 1] = _div_round_vec(C3*o0 + C1*o1 + S1*o2 + S3*o3, _DEN_SQRT2_2)
+    out[..., 3] = _div_round_vec(S1*o0 - C3*o1 + S3*o2 + C1*o3, _DEN_SQRT2_2)
+    out[..., 5] = _div_round_vec(C1*o0 - S3*o1 - C3*o2 - S1*o3, _DEN_SQRT2_2)
+    out[..., 7] = _div_round_vec(-S3*o0 + S1*o1 - C1*o2 + C3*o3, _DEN_SQRT2_2)
 
-    return np.array(out, dtype=TYPE)
+    return out
 
 
-def idct_loeffler_1d(x):
-    """Inverse 1D DCT — Loeffler, deferred-division strategy.
+def idct_loeffler_1d_fast(v):
+    """Inverse Loeffler DCT on the last axis of an int64 (..., 8) array.
 
-    Matches C's idct_1d_stride exactly:
+    Deferred-division strategy, matching C's idct_1d_stride exactly:
     - Even path: zero intermediate divisions (all kept at scale SC)
     - Odd path: one div_round to normalize from SC² to 4·SC
     - Final: single div_round(... , 8·SC) per output
     """
-    v = [int(xi) for xi in np.asarray(x, dtype=np.int64).flatten()]
+    assert v.dtype == np.int64 and v.shape[-1] == 8
 
-    Z0 = v[0]*2; Z1 = v[1]*2; Z2 = v[2]*2; Z3 = v[3]*2
-    Z4 = v[4]*2; Z5 = v[5]*2; Z6 = v[6]*2; Z7 = v[7]*2
+    Z0 = v[..., 0]*2; Z1 = v[..., 1]*2; Z2 = v[..., 2]*2; Z3 = v[..., 3]*2
+    Z4 = v[..., 4]*2; Z5 = v[..., 5]*2; Z6 = v[..., 6]*2; Z7 = v[..., 7]*2
 
     # Even part — zero intermediate divisions
     t0_s = Z0 * SQRT_2                        # t0 * SC
@@ -99,55 +120,63 @@ def idct_loeffler_1d(x):
     n2 = S1*Z1 + S3*Z3 - C3*Z5 - C1*Z7
     n3 = S3*Z1 + C1*Z3 - S1*Z5 + C3*Z7
 
-    d07_4s = _div_round(2 * SCALE_CONST * (n0 + n3), SQRT_2)
-    d34_4s = _div_round(2 * SCALE_CONST * (n0 - n3), SQRT_2)
-    d16_4s = _div_round(2 * SCALE_CONST * (n1 + n2), SQRT_2)
-    d25_4s = _div_round(2 * SCALE_CONST * (n1 - n2), SQRT_2)
+    d07_4s = _div_round_vec(_DEN_SC_2 * (n0 + n3), SQRT_2)
+    d34_4s = _div_round_vec(_DEN_SC_2 * (n0 - n3), SQRT_2)
+    d16_4s = _div_round_vec(_DEN_SC_2 * (n1 + n2), SQRT_2)
+    d25_4s = _div_round_vec(_DEN_SC_2 * (n1 - n2), SQRT_2)
 
     # Final butterfly — single rounding division per output
-    final_div = 8 * SCALE_CONST
-    out = [0] * 8
-    out[0] = _div_round(s07_4s + d07_4s, final_div)
-    out[7] = _div_round(s07_4s - d07_4s, final_div)
-    out[1] = _div_round(s16_4s + d16_4s, final_div)
-    out[6] = _div_round(s16_4s - d16_4s, final_div)
-    out[2] = _div_round(s25_4s + d25_4s, final_div)
-    out[5] = _div_round(s25_4s - d25_4s, final_div)
-    out[3] = _div_round(s34_4s + d34_4s, final_div)
-    out[4] = _div_round(s34_4s - d34_4s, final_div)
+    out = np.empty(v.shape, dtype=np.int64)
+    out[..., 0] = _div_round_vec(s07_4s + d07_4s, _DEN_SC_8)
+    out[..., 7] = _div_round_vec(s07_4s - d07_4s, _DEN_SC_8)
+    out[..., 1] = _div_round_vec(s16_4s + d16_4s, _DEN_SC_8)
+    out[..., 6] = _div_round_vec(s16_4s - d16_4s, _DEN_SC_8)
+    out[..., 2] = _div_round_vec(s25_4s + d25_4s, _DEN_SC_8)
+    out[..., 5] = _div_round_vec(s25_4s - d25_4s, _DEN_SC_8)
+    out[..., 3] = _div_round_vec(s34_4s + d34_4s, _DEN_SC_8)
+    out[..., 4] = _div_round_vec(s34_4s - d34_4s, _DEN_SC_8)
+
+    return out
+
 
-    return np.array(out, dtype=TYPE)
+def dct_loeffler_1d(x):
+    """Forward 1D DCT — Loeffler, matching C's dct_1d_stride exactly."""
+    v = np.asarray(x, dtype=np.int64).reshape(8)
+    return dct_loeffler_1d_fast(v).astype(TYPE)
+
+
+def idct_loeffler_1d(x):
+    """Inverse 1D DCT — Loeffler, matching C's idct_1d_stride exactly."""
+    v = np.asarray(x, dtype=np.int64).reshape(8)
+    return idct_loeffler_1d_fast(v).astype(TYPE)
 
 
 # =====================================================================
 #  Matrix DCT / IDCT  (dct_matrix.c)
 # =====================================================================
 
-def dct_matrix_1d(x):
-    """Forward 1D DCT — matrix multiplication, matching C exactly."""
-    v = np.asarray(x, dtype=np.int64).flatten()
-    out = np.zeros(8, dtype=np.int64)
+# NORM[k] * COS[k, n] — coefficient pre-multiplied as in C's idct_1d_stride
+_MATRIX_NORM_COS = MATRIX_NORM_COL * MATRIX_COS
+_MATRIX_NORM_COS_T = np.ascontiguousarray(_MATRIX_NORM_COS.T)
 
-    for k in range(8):
-        s = 0
-        for n in range(8):
-            s += int(v[n]) * int(MATRIX_COS[k, n])
-        out[k] = _div_round(s * int(MATRIX_NORM[k]), MATRIX_SCALE_SQ)
 
+def dct_matrix_1d(x):
+    """Forward 1D DCT — matrix multiplication, matching C exactly.
+
+    int64 like C: sum_n x[n] * COS[k, n], then div_round(sum * NORM[k], SCALE²).
+    """
+    v = np.asarray(x, dtype=np.int64).reshape(8)
+    out = _div_round_vec((MATRIX_COS @ v) * MATRIX_NORM, MATRIX_SCALE_SQ)
     return out.astype(TYPE)
 
 
 def idct_matrix_1d(X):
-    """Inverse 1D DCT — matrix multiplication, matching C exactly."""
-    v = np.asarray(X, dtype=np.int64).flatten()
-    out = np.zeros(8, dtype=np.int64)
-
-    for n in range(8):
-        s = 0
-        for k in range(8):
-            s += int(v[k]) * int(MATRIX_NORM[k]) * int(MATRIX_COS[k, n])
-        out[n] = _div_round(s, MATRIX_SCALE_SQ)
+    """Inverse 1D DCT — matrix multiplication, matching C exactly.
 
+    int64 like C: div_round(sum_k X[k] * NORM[k] * COS[k, n], SCALE²).
+    """
+    v = np.asarray(X, dtype=np.int64).reshape(8)
+    out = _div_round_vec(v @ _MATRIX_NORM_COS, MATRIX_SCALE_SQ)
     return out.astype(TYPE)
 
 
@@ -155,57 +184,109 @@ def idct_matrix_1d(X):
 #  Approximate DCT / IDCT — Cintra-Bayer 2011  (dct_approx.c)
 # =====================================================================
 
-def dct_approximate_1d(x):
-    """Forward 1D approx DCT — only additions, matching C exactly."""
-    v = [int(xi) for xi in np.asarray(x, dtype=np.int64).flatten()]
-    x0, x1, x2, x3, x4, x5, x6, x7 = v
+def dct_approximate_1d_fast(v):
+    """Forward approx DCT on the last axis of an int64 (..., 8) array.
+
+    Same sums as dct_approx.c, factored into the Cintra-Bayer butterfly
+    (shared partial sums: 22 additions instead of 40). Integer addition is
+    exact, so the result is identical.
+    """
+    assert v.dtype == np.int64 and v.shape[-1] == 8
+    x0, x1, x2, x3 = v[..., 0], v[..., 1], v[..., 2], v[..., 3]
+    x4, x5, x6, x7 = v[..., 4], v[..., 5], v[..., 6], v[..., 7]
 
-    out = [0] * 8
-    out[0] = x0 + x1 + x2 + x3 + x4 + x5 + x6 + x7
-    out[1] = x0 + x1 + x2 - x5 - x6 - x7
-    out[2] = x0 - x3 - x4 + x7
-    out[3] = x0 - x2 - x3 + x4 + x5 - x7
-    out[4] = x0 - x1 - x2 + x3 + x4 - x5 - x6 + x7
-    out[5] = x0 - x1 + x3 - x4 + x6 - x7
-    out[6] = -x1 + x2 + x5 - x6
-    out[7] = -x1 + x2 - x3 + x4 - x5 + x6
+    # Stage 1: symmetric / antisymmetric pairs
+    s07, d07 = x0 + x7, x0 - x7
+    s16, d16 = x1 + x6, x1 - x6
+    s25, d25 = x2 + x5, x2 - x5
+    s34, d34 = x3 + x4, x3 - x4
 
-    return np.array(out, dtype=TYPE)
+    # Stage 2: even part
+    e0 = s07 + s34
+    e1 = s16 + s25
 
+    out = np.empty(v.shape, dtype=np.int64)
+    out[..., 0] = e0 + e1
+    out[..., 4] = e0 - e1
+    out[..., 2] = s07 - s34
+    out[..., 6] = s25 - s16
 
-def idct_approximate_1d(Y):
-    """Inverse 1D approx DCT — norm-based inverse, matching C exactly.
+    # Odd part
+    out[..., 1] = d07 + d16 + d25
+    out[..., 3] = d07 - d25 - d34
+    out[..., 5] = d07 - d16 + d34
+    out[..., 7] = d25 - d16 - d34
+
+    return out
+
+
+def idct_approximate_1d_fast(v):
+    """Inverse approx DCT on the last axis of an int64 (..., 8) array.
 
     C uses:
         norm^2 = {8, 6, 4, 6, 8, 6, 4, 6}
         scale  = 24/norm^2 = {3, 4, 6, 4, 3, 4, 6, 4}
         Pre-scale each coeff, then T^T multiply, then /24 with rounding.
+
+    T^T is evaluated as a butterfly: outputs n and 7-n share an even-row
+    sum E_n and an odd-row sum O_n (out[n] = E_n + O_n, out[7-n] = E_n - O_n).
     """
-    v = [int(yi) for yi in np.asarray(Y, dtype=np.int64).flatten()]
+    assert v.dtype == np.int64 and v.shape[-1] == 8
 
     # Pre-scale by norm factor
-    a0 = v[0] * 3   # norm^2 = 8
-    a1 = v[1] * 4   # norm^2 = 6
-    a2 = v[2] * 6   # norm^2 = 4
-    a3 = v[3] * 4   # norm^2 = 6
-    a4 = v[4] * 3   # norm^2 = 8
-    a5 = v[5] * 4   # norm^2 = 6
-    a6 = v[6] * 6   # norm^2 = 4
-    a7 = v[7] * 4   # norm^2 = 6
-
-    # T^T * scaled, divide by 24 with rounding (add 12 = 24/2)
+    a = v * APPROX_IDCT_SCALE
+    a0, a1, a2, a3 = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    a4, a5, a6, a7 = a[..., 4], a[..., 5], a[..., 6], a[..., 7]
+
+    # Even rows (0, 2, 4, 6)
+    p04, m04 = a0 + a4, a0 - a4
+    e0, e3 = p04 + a2, p04 - a2
+    e1, e2 = m04 - a6, m04 + a6
+
+    # Odd rows (1, 3, 5, 7)
+    o0 = a1 + a3 + a5
+    o1 = a1 - a5 - a7
+    o2 = a1 - a3 + a7
+    o3 = a5 - a3 - a7
+
+    # Divide by 24 with rounding (add 12 = 24/2)
     # C uses (... + 12) / 24 where / is C truncation toward zero
-    out = [0] * 8
-    out[0] = _c_div(a0 + a1 + a2 + a3 + a4 + a5 + 12, 24)
-    out[1] = _c_div(a0 + a1 - a4 - a5 - a6 - a7 + 12, 24)
-    out[2] = _c_div(a0 + a1 - a3 - a4 + a6 + a7 + 12, 24)
-    out[3] = _c_div(a0 - a2 - a3 + a4 + a5 - a7 + 12, 24)
-    out[4] = _c_div(a0 - a2 + a3 + a4 - a5 + a7 + 12, 24)
-    out[5] = _c_div(a0 - a1 + a3 - a4 + a6 - a7 + 12, 24)
-    out[6] = _c_div(a0 - a1 - a4 + a5 - a6 + a7 + 12, 24)
-    out[7] = _c_div(a0 - a1 + a2 - a3 + a4 - a5 + 12, 24)
+    e0 += 12
+    e1 += 12
+    e2 += 12
+    e3 += 12
+
+    out = np.empty(v.shape, dtype=np.int64)
+    out[..., 0] = _c_div_i64(e0 + o0, 24)
+    out[..., 7] = _c_div_i64(e0 - o0, 24)
+    out[..., 1] = _c_div_i64(e1 + o1, 24)
+    out[..., 6] = _c_div_i64(e1 - o1, 24)
+    out[..., 2] = _c_div_i64(e2 + o2, 24)
+    out[..., 5] = _c_div_i64(e2 - o2, 24)
+    out[..., 3] = _c_div_i64(e3 + o3, 24)
+    out[..., 4] = _c_div_i64(e3 - o3, 24)
+
+    return out
+
+
+# Pre-scale + T^T sum of C's idct_1d_stride folded into one matrix
+_APPROX_IDCT_T = T_APPROX.T * APPROX_IDCT_SCALE
+
 
-    return np.array(out, dtype=TYPE)
+def dct_approximate_1d(x):
+    """Forward 1D approx DCT — only additions, matching C exactly.
+
+    A single vector is one product with T_APPROX; the batched path uses the
+    butterfly kernel above.
+    """
+    v = np.asarray(x, dtype=np.int64).reshape(8)
+    return (T_APPROX @ v).astype(TYPE)
+
+
+def idct_approximate_1d(Y):
+    """Inverse 1D approx DCT — norm-based inverse, matching C exactly."""
+    v = np.asarray(Y, dtype=np.int64).reshape(8)
+    return _c_div_i64(_APPROX_IDCT_T @ v + 12, 24).astype(TYPE)
 
 
 # =====================================================================
@@ -213,11 +294,11 @@ def idct_approximate_1d(Y):
 # =====================================================================
 
 def dct_identity_1d(x):
-    return np.asarray(x, dtype=TYPE).flatten().copy()
+    return np.array(x, dtype=TYPE).ravel()  # single copy; ravel of it is a view
 
 
 def idct_identity_1d(X):
-    return np.asarray(X, dtype=TYPE).flatten().copy()
+    return np.array(X, dtype=TYPE).ravel()  # single copy; ravel of it is a view
 
 
 # =====================================================================
@@ -226,21 +307,140 @@ def idct_identity_1d(X):
 
 def dct_2d(block_8x8, func_dct_1d):
     """Forward 2D DCT: rows first, then columns (matches C dct_*_2d)."""
+    kernel = _DCT_2D_BATCH.get(func_dct_1d)
+    if kernel is not None:
+        # Known transform: one vectorized call instead of 16 1D calls
+        return kernel(block_8x8)[0]
     blk = np.asarray(block_8x8, dtype=TYPE).reshape(8, 8)
+    temp = np.empty((8, 8), dtype=TYPE)
+    result = np.empty((8, 8), dtype=TYPE)
     # Row transform
-    temp = np.array([func_dct_1d(blk[y, :]) for y in range(8)], dtype=TYPE)
-    # Column transform
-    result_cols = np.array([func_dct_1d(temp[:, x]) for x in range(8)], dtype=TYPE)
-    # Transpose (matches C's explicit transpose step)
-    return result_cols.T
+    for y in range(8):
+        temp[y] = func_dct_1d(blk[y, :])
+    # Column transform, written back as columns (C's explicit transpose step)
+    for x in range(8):
+        result[:, x] = func_dct_1d(temp[:, x])
+    return result
 
 
 def idct_2d(block_dct_8x8, func_idct_1d):
     """Inverse 2D DCT: columns first, then rows (matches C idct_*_2d)."""
+    kernel = _IDCT_2D_BATCH.get(func_idct_1d)
+    if kernel is not None:
+        return kernel(block_dct_8x8)[0]
     blk = np.asarray(block_dct_8x8, dtype=TYPE).reshape(8, 8)
+    temp = np.empty((8, 8), dtype=TYPE)
+    result = np.empty((8, 8), dtype=TYPE)
     # Column transform first (matches C)
-    temp_cols = np.array([func_idct_1d(blk[:, x]) for x in range(8)], dtype=TYPE)
-    temp = temp_cols.T  # each result stored as row → transpose back
+    for x in range(8):
+        temp[:, x] = func_idct_1d(blk[:, x])
     # Row transform second
-    result = np.array([func_idct_1d(temp[y, :]) for y in range(8)], dtype=TYPE)
+    for y in range(8):
+        result[y] = func_idct_1d(temp[y, :])
     return result
+
+
+# =====================================================================
+#  Batched 2D transforms over (N, 8, 8) blocks
+# =====================================================================
+
+def _separable_dct_2d(blocks, kernel_1d):
+    """Rows, then columns, of every block with a (..., 8) int64 kernel."""
+    blk = np.asarray(blocks, dtype=np.int64).reshape(-1, 8, 8)
+    temp = kernel_1d(blk)
+    return kernel_1d(temp.swapaxes(1, 2)).swapaxes(1, 2).astype(TYPE)
+
+
+def _separable_idct_2d(blocks, kernel_1d):
+    """Columns, then rows, of every block with a (..., 8) int64 kernel."""
+    blk = np.asarray(blocks, dtype=np.int64).reshape(-1, 8, 8)
+    temp = kernel_1d(blk.swapaxes(1, 2)).swapaxes(1, 2)
+    return kernel_1d(temp).astype(TYPE)
+
+
+def dct_loeffler_2d_batch(blocks):
+    """Forward 2D Loeffler DCT for all blocks at once (matches C dct_loeffler_2d)."""
+    return _separable_dct_2d(blocks, dct_loeffler_1d_fast)
+
+
+def idct_loeffler_2d_batch(blocks):
+    """Inverse 2D Loeffler DCT for all blocks at once (matches C idct_loeffler_2d)."""
+    return _separable_idct_2d(blocks, idct_loeffler_1d_fast)
+
+
+def dct_approximate_2d_batch(blocks):
+    """Forward 2D approx DCT for all blocks at once (matches C dct_approx_2d)."""
+    return _separable_dct_2d(blocks, dct_approximate_1d_fast)
+
+
+def idct_approximate_2d_batch(blocks):
+    """Inverse 2D approx DCT for all blocks at once (matches C idct_approx_2d)."""
+    return _separable_idct_2d(blocks, idct_approximate_1d_fast)
+
+
+def dct_identity_2d_batch(blocks):
+    return np.asarray(blocks, dtype=TYPE).reshape(-1, 8, 8).copy()
+
+
+def dct_matrix_2d_batch(blocks):
+    """Forward 2D matrix DCT for all blocks at once (matches C dct_matrix_2d).
+
+    Row pass then column pass, each with div_round(sum * NORM[k], SCALE²),
+    as two int64 matmuls over the (N, 8, 8) stack — exact, no floats.
+    """
+    blk = np.asarray(blocks, dtype=np.int64).reshape(-1, 8, 8)
+    temp = _div_round_vec((blk @ MATRIX_COS_T) * MATRIX_NORM, MATRIX_SCALE_SQ)
+    out = _div_round_vec((MATRIX_COS @ temp) * MATRIX_NORM_COL,
+                         MATRIX_SCALE_SQ)
+    return out.astype(TYPE)
+
+
+def idct_matrix_2d_batch(blocks):
+    """Inverse 2D matrix DCT for all blocks at once (matches C idct_matrix_2d).
+
+    Column pass then row pass, each with div_round(sum, SCALE²).
+    """
+    blk = np.asarray(blocks, dtype=np.int64).reshape(-1, 8, 8)
+    temp = _div_round_vec(_MATRIX_NORM_COS_T @ blk, MATRIX_SCALE_SQ)
+    out = _div_round_vec(temp @ _MATRIX_NORM_COS, MATRIX_SCALE_SQ)
+    return out.astype(TYPE)
+
+
+# 1D function → batched 2D kernel (methods without one fall back per block)
+_DCT_2D_BATCH = {
+    dct_loeffler_1d: dct_loeffler_2d_batch,
+    dct_matrix_1d: dct_matrix_2d_batch,
+    dct_approximate_1d: dct_approximate_2d_batch,
+    dct_identity_1d: dct_identity_2d_batch,
+}
+
+_IDCT_2D_BATCH = {
+    idct_loeffler_1d: idct_loeffler_2d_batch,
+    idct_matrix_1d: idct_matrix_2d_batch,
+    idct_approximate_1d: idct_approximate_2d_batch,
+    idct_identity_1d: dct_identity_2d_batch,
+}
+
+
+def dct_2d_batch(blocks, func_dct_1d):
+    """Forward 2D DCT of every block in a (N, 8, 8) stack."""
+    kernel = _DCT_2D_BATCH.get(func_dct_1d)
+    if kernel is not None:
+        return kernel(blocks)
+    blk = np.asarray(blocks, dtype=TYPE).reshape(-1, 8, 8)
+    out = np.empty_like(blk)
+    for b in range(blk.shape[0]):
+        out[b] = dct_2d(blk[b], func_dct_1d)
+    return out
+
+
+def idct_2d_batch(blocks, func_idct_1d):
+    """Inverse 2D DCT of every block in a (N, 8, 8) stack."""
+    kernel = _IDCT_2D_BATCH.get(func_idct_1d)
+    if kernel is not None:
+        return kernel(blocks)
+    blk = np.asarray(blocks, dtype=TYPE).reshape(-1, 8, 8)
+    out = np.empty_like(blk)
+    for b in range(blk.shape[0]):
+        out[b] = idct_2d(blk[b], func_idct_1d)
+    return out
@@ -8,45 +8,81 @@ Uso:
     cd src_py
     python main.py                    # usa libimage C por padrão
     python main.py --pure-python      # usa implementação Python pura
+    python main.py --jobs 4           # 4 imagens em paralelo (processos)
+    python main.py --jobs 0           # todos os núcleos menos um
+    IC_JPEG_NO_PLOTS=1 python main.py # sem gráficos por imagem (benchmark)
 """
 
 import os
 import sys
 import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 
 import numpy as np
 from PIL import Image
 
 from constantes import Q50_LUMA, Q50_CHROMA, TYPE
-from plots import quality_metrics, compute_bitrate, print_results
-from plots import plot_psnr, plot_ssim, plot_bitrate, plot_dataset
+from dct import (dct_loeffler_1d, idct_loeffler_1d,
+                 dct_matrix_1d, idct_matrix_1d,
+                 dct_approximate_1d, idct_approximate_1d,
+                 dct_identity_1d, idct_identity_1d)
+from pipeline import (rgb_to_ycbcr, ycbcr_to_rgb,
+                      forward_dct_planes, reconstruct_planes_from_dct,
+                      prepare_quant_table)
+from metrics import quality_metrics, compute_bitrate
 
 # ---------------- CONFIGURATION ----------------
 INPUT_DIR = 'imgs'
 K_FACTORS = [0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 4.0]
+# IC_JPEG_NO_PLOTS=1 skips the per-image PSNR/SSIM/bitrate figures (benchmarking)
+PER_IMAGE_PLOTS = not os.environ.get('IC_JPEG_NO_PLOTS')
+
+
+def _save_recon(recon, path):
+    """Write one reconstruction PNG (diagnostic output: fastest zlib level)."""
+    try:
+        Image.fromarray(recon).save(path, compress_level=1)
+    except Exception:
+        pass
 
 
 # ================================================================
 #  Mode A: Use C libimage via ctypes (exact same code as ESP32)
 # ================================================================
 
-def _get_libimage():
-    """Load the C libimage wrapper."""
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    sys.path.insert(0, os.path.join(root, 'libimage', 'python'))
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_ROOT, 'libimage', 'python'))
+try:
     from libimage_wrapper import LibImage
-    lib_path = os.path.join(root, 'libimage', 'bin', 'libimage.so')
+except ImportError:  # --pure-python does not need the C wrapper
+    LibImage = None
+
+
+@lru_cache(maxsize=None)
+def _get_libimage():
+    """Load the C libimage wrapper (once per process, also in --jobs workers)."""
+    if LibImage is None:
+        raise ImportError('libimage_wrapper not found in libimage/python')
+    lib_path = os.path.join(_ROOT, 'libimage', 'bin', 'libimage.so')
     return LibImage(lib_path)
 
 
 def process_image_c(path, dct_method, k_factors, lib):
     """Process image using C libimage (compress + decompress)."""
     img = Image.open(path).convert('RGB')
-    arr = np.array(img).astype(np.uint8)
+    arr = np.array(img)  # RGB mode is already uint8
+
+    image_name = os.path.basename(path)
+    subdir = os.path.join(f'results_{dct_method}', image_name.split('.')[0])
+    os.makedirs(subdir, exist_ok=True)
 
     results = []
     bitrate_list = []
+    # One writer thread: saves stay in k order (k=0.25 and k=0.5 share a file)
+    saver = ThreadPoolExecutor(max_workers=1)
     start_total = time.perf_counter()
 
     for k in k_factors:
@@ -61,28 +97,22 @@ def process_image_c(path, dct_method, k_factors, lib):
 
         recon = res['recon_rgb']
 
-        # Save
-        subdir = os.path.join(f'results_{dct_method}',
-                              os.path.basename(path).split('.')[0])
-        os.makedirs(subdir, exist_ok=True)
-        try:
-            Image.fromarray(recon).save(os.path.join(subdir, f"k={int(k)}.png"))
-        except Exception:
-            pass
+        # Save in the background, overlapping the next k
+        saver.submit(_save_recon, recon, os.path.join(subdir, f"k={int(k)}.png"))
 
         psnr_val, ssim_val = quality_metrics(arr, recon)
 
-        stats_y  = compute_bitrate(res['y_quantized'])
-        stats_cb = compute_bitrate(res['cb_quantized'])
-        stats_cr = compute_bitrate(res['cr_quantized'])
-        combined_bpp = (stats_y['bpp_amplitude'] + stats_cb['bpp_amplitude']
-                        + stats_cr['bpp_amplitude']) / 3.0
-        combined_stats = {'bpp_amplitude': combined_bpp}
+        # Y/Cb/Cr have the same block count, so the bpp over all blocks
+        # is the mean of the per-channel bpp
+        combined_stats = compute_bitrate(np.concatenate(
+            [res['y_quantized'], res['cb_quantized'], res['cr_quantized']]))
+        combined_bpp = combined_stats['bpp_amplitude']
 
         t_ms = (t1 - t0) * 1000.0
         results.append((k, psnr_val, ssim_val, t_ms, combined_bpp))
-        bitrate_list.append((k, combined_stats, os.path.basename(path)))
+        bitrate_list.append((k, combined_stats, image_name))
 
+    saver.shutdown()
     end_total = time.perf_counter()
     total_ms = (end_total - start_total) * 1000.0
     return results, total_ms, bitrate_list
@@ -92,81 +122,83 @@ def process_image_c(path, dct_method, k_factors, lib):
 #  Mode B: Pure Python (identical arithmetic to C)
 # ================================================================
 
+METHOD_MAP = {
+    'loeffler':    (dct_loeffler_1d,    idct_loeffler_1d),
+    'matrix':      (dct_matrix_1d,      idct_matrix_1d),
+    'approximate': (dct_approximate_1d, idct_approximate_1d),
+    'approx':      (dct_approximate_1d, idct_approximate_1d),
+    'identity':    (dct_identity_1d,    idct_identity_1d),
+}
+
+
 def process_image_python(path, dct_method, k_factors):
     """Process image using pure Python pipeline (matching C exactly)."""
-    from dct import (dct_loeffler_1d, idct_loeffler_1d,
-                     dct_matrix_1d, idct_matrix_1d,
-                     dct_approximate_1d, idct_approximate_1d,
-                     dct_identity_1d, idct_identity_1d)
-    from pipeline import rgb_to_ycbcr, ycbcr_to_rgb, process_channel
-
-    METHOD_MAP = {
-        'loeffler':    (dct_loeffler_1d,    idct_loeffler_1d),
-        'matrix':      (dct_matrix_1d,      idct_matrix_1d),
-        'approximate': (dct_approximate_1d, idct_approximate_1d),
-        'approx':      (dct_approximate_1d, idct_approximate_1d),
-        'identity':    (dct_identity_1d,    idct_identity_1d),
-    }
-
     dct_1d, idct_1d = METHOD_MAP[dct_method]
 
     img = Image.open(path).convert('RGB')
-    arr = np.array(img).astype(np.uint8)
-    r, g, b = arr[:, :, 0], arr[:, :, 1], arr[:, :, 2]
-    y, cb, cr = rgb_to_ycbcr(r, g, b)
+    arr = np.array(img)  # RGB mode is already uint8
+    y, cb, cr = rgb_to_ycbcr(arr)
 
     is_identity = (dct_method == 'identity')
     is_approx = (dct_method in ('approximate', 'approx'))
 
+    image_name = os.path.basename(path)
+    subdir = os.path.join(f'results_{dct_method}', image_name.split('.')[0])
+    os.makedirs(subdir, exist_ok=True)
+
     results = []
     bitrate_list = []
+    # One writer thread: saves stay in k order (k=0.25 and k=0.5 share a file)
+    saver = ThreadPoolExecutor(max_workers=1)
     start_total = time.perf_counter()
 
+    # The forward DCT does not depend on k: do it once for the Y/Cb/Cr
+    # planes and charge its cost to every k so per-k times still cover the
+    # full codec.
+    h, w = y.shape
+    t0 = time.perf_counter()
+    dct_planes, num_blocks = forward_dct_planes(np.stack([y, cb, cr]), dct_1d)
+    t_forward = time.perf_counter() - t0
+
+    # Y/Cb/Cr quantization tables for every k, scaled once up-front
+    if is_identity:
+        q_luma = np.ones(64, dtype=np.int32)
+        q_chroma = np.ones(64, dtype=np.int32)
+    else:
+        q_luma = Q50_LUMA
+        q_chroma = Q50_CHROMA
+    scaled_tables = {}
     for k in k_factors:
-        t0 = time.perf_counter()
+        k_used = 1.0 if is_identity else k
+        luma = prepare_quant_table(q_luma, k_used, is_approx)
+        chroma = prepare_quant_table(q_chroma, k_used, is_approx)
+        scaled_tables[k] = (luma, chroma, chroma)
 
-        if is_identity:
-            k_used = 1.0
-            q_luma = np.ones(64, dtype=np.int32)
-            q_chroma = np.ones(64, dtype=np.int32)
-        else:
-            k_used = k
-            q_luma = Q50_LUMA
-            q_chroma = Q50_CHROMA
+    for k in k_factors:
+        t0 = time.perf_counter()
 
-        y_rec, y_q = process_channel(y, q_luma, k_used, dct_1d, idct_1d,
-                                     is_identity, is_approx=is_approx)
-        cb_rec, cb_q = process_channel(cb, q_chroma, k_used, dct_1d, idct_1d,
-                                       is_identity, is_approx=is_approx)
-        cr_rec, cr_q = process_channel(cr, q_chroma, k_used, dct_1d, idct_1d,
-                                       is_identity, is_approx=is_approx)
+        (y_rec, cb_rec, cr_rec), quantized = reconstruct_planes_from_dct(
+            dct_planes, num_blocks, w, h, scaled_tables[k], idct_1d, is_identity)
 
         recon = ycbcr_to_rgb(y_rec, cb_rec, cr_rec)
 
-        # Save
-        subdir = os.path.join(f'results_{dct_method}',
-                              os.path.basename(path).split('.')[0])
-        os.makedirs(subdir, exist_ok=True)
-        try:
-            Image.fromarray(recon).save(os.path.join(subdir, f"k={int(k)}.png"))
-        except Exception:
-            pass
-
         t1 = time.perf_counter()
 
+        # Save in the background (outside the timed region, as in Mode A)
+        saver.submit(_save_recon, recon, os.path.join(subdir, f"k={int(k)}.png"))
+
         psnr_val, ssim_val = quality_metrics(arr, recon)
 
-        stats_y  = compute_bitrate(y_q)
-        stats_cb = compute_bitrate(cb_q)
-        stats_cr = compute_bitrate(cr_q)
-        combined_bpp = (stats_y['bpp_amplitude'] + stats_cb['bpp_amplitude']
-                        + stats_cr['bpp_amplitude']) / 3.0
-        combined_stats = {'bpp_amplitude': combined_bpp}
+        # (3, N, 64) Y/Cb/Cr stack: equal block counts, so this is the
+        # mean of the per-channel bpp
+        combined_stats = compute_bitrate(quantized)
+        combined_bpp = combined_stats['bpp_amplitude']
 
-        t_ms = (t1 - t0) * 1000.0
+        t_ms = (t1 - t0 + t_forward) * 1000.0
         results.append((k, psnr_val, ssim_val, t_ms, combined_bpp))
-        bitrate_list.append((k, combined_stats, os.path.basename(path)))
+        bitrate_list.append((k, combined_stats, image_name))
 
+    saver.shutdown()
     end_total = time.perf_counter()
     total_ms = (end_total - start_total) * 1000.0
     return results, total_ms, bitrate_list
@@ -176,10 +208,23 @@ def process_image_python(path, dct_method, k_factors):
 #  Main
 # ================================================================
 
-def process_dataset(dct_method, use_python=False):
+def _process_file(path, dct_method, use_python, lib=None):
+    """Process one image file (also the worker entry point for --jobs)."""
+    if use_python:
+        return process_image_python(path, dct_method, K_FACTORS)
+    return process_image_c(path, dct_method, K_FACTORS, lib or _get_libimage())
+
+
+def process_dataset(dct_method, use_python=False, jobs=1):
+    # Imported here, not at module level: --jobs compute workers import this
+    # module but never plot, so they do not load matplotlib
+    from plots import (print_results, plot_psnr, plot_ssim, plot_bitrate,
+                       plot_dataset, submit_plot, wait_plots)
+
     print(f'\n{"="*60}')
     print(f'DCT METHOD: {dct_method.upper()}')
     print(f'ENGINE:     {"Python puro" if use_python else "C libimage"}')
+    print(f'JOBS:       {jobs}')
     print(f'{"="*60}\n')
 
     results_dir = f'results_{dct_method}'
@@ -204,27 +249,41 @@ def process_dataset(dct_method, use_python=False):
     global_results = []
     global_bitrates = []
 
-    for f in files:
-        path = os.path.join(INPUT_DIR, f)
-        print('\n>>> Processing:', path)
-
-        if use_python:
-            results, t_ms, bitrate_list = process_image_python(
-                path, dct_method, K_FACTORS)
-        else:
-            results, t_ms, bitrate_list = process_image_c(
-                path, dct_method, K_FACTORS, lib)
-
-        global_results.append(results)
-        global_bitrates.append(bitrate_list)
-
-        print_results(results, t_ms, os.path.basename(path),
-                      output_dir=results_dir, plot_dir=plots_dir)
-        plot_psnr(results, os.path.basename(path), out_dir=plots_dir)
-        plot_ssim(results, os.path.basename(path), out_dir=plots_dir)
-        plot_bitrate(bitrate_list, os.path.basename(path), out_dir=plots_dir)
-
-    plot_dataset(global_results, global_bitrates, out_dir=plots_dir)
+    # Images are independent: compute workers (--jobs) only compress them.
+    # The parent prints results in file order and hands the per-image figures
+    # to the plots.py pool (submit_plot), whose workers only receive the
+    # pickled results lists.
+    paths = [os.path.join(INPUT_DIR, f) for f in files]
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    if executor:
+        outputs = executor.map(_process_file, paths,
+                               repeat(dct_method), repeat(use_python))
+    else:
+        outputs = map(_process_file, paths,
+                      repeat(dct_method), repeat(use_python), repeat(lib))
+
+    try:
+        for path, (results, t_ms, bitrate_list) in zip(paths, outputs):
+            print('\n>>> Processing:', path)
+
+            global_results.append(results)
+            global_bitrates.append(bitrate_list)
+
+            name = os.path.basename(path)
+            print_results(results, t_ms, name,
+                          output_dir=results_dir, plot_dir=plots_dir)
+            if PER_IMAGE_PLOTS:
+                submit_plot(plot_psnr, results, name, out_dir=plots_dir)
+                submit_plot(plot_ssim, results, name, out_dir=plots_dir)
+                submit_plot(plot_bitrate, bitrate_list, name, out_dir=plots_dir)
+
+        plot_dataset(global_results, global_bitrates, out_dir=plots_dir)
+    finally:
+        # Also on errors (e.g. a worker failing on a corrupt image), so
+        # neither pool is left running
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        wait_plots()
 
 
 if __name__ == '__main__':
@@ -236,7 +295,13 @@ if __name__ == '__main__':
                         help='Use pure Python implementation instead of C libimage')
     parser.add_argument('--input-dir', default=None,
                         help='Input images directory (default: imgs)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Images processed in parallel worker processes; '
+                             '0 = all cores but one (default: 1; per-k '
+                             'timings are only comparable with 1)')
     args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error('--jobs must be >= 0')
 
     if args.input_dir:
         INPUT_DIR = args.input_dir
@@ -244,4 +309,5 @@ if __name__ == '__main__':
     if not os.path.exists(INPUT_DIR):
         os.makedirs(INPUT_DIR)
 
-    process_dataset(args.method, use_python=args.pure_python)
+    jobs = args.jobs if args.jobs > 0 else max(1, (os.cpu_count() or 2) - 1)
+    process_dataset(args.method, use_python=args.pure_python, jobs=jobs)
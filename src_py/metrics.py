@@ -0,0 +1,42 @@
+"""
+metrics.py — Métricas de qualidade (PSNR/SSIM) e bitrate.
+
+Separado de plots.py para que os workers de --jobs não importem matplotlib.
+"""
+
+import numpy as np
+from skimage.metrics import peak_signal_noise_ratio as compute_psnr
+from skimage.metrics import structural_similarity as compute_ssim
+
+# Single implementation lives with the rest of the C-matching code; kept
+# importable from here for main.py / compare_methods.py
+from pipeline import compute_bitrate  # noqa: F401
+
+
+def _is_gray(img):
+    """True for an (H, W, C) image whose channels are all equal."""
+    return bool((img[..., 1:] == img[..., :1]).all())
+
+
+def quality_metrics(original, reconstructed):
+    """PSNR and SSIM of a reconstruction; both images are expected as uint8.
+
+    Grayscale content gets a single 2D SSIM pass instead of one per channel.
+    This covers 2D arrays from external callers and, for the repo's loaders
+    (which all convert('RGB')), grayscale files read as R = G = B. In that
+    case the per-channel SSIMs are equal, so the result is the same.
+    """
+    psnr = compute_psnr(original, reconstructed, data_range=255)
+    if np.isinf(psnr):
+        return psnr, 1.0  # identical images: SSIM is exactly 1, skip the windows
+    kw = dict(data_range=255, win_size=7)
+    if original.ndim == 3 and original.shape[-1] > 1:
+        if _is_gray(original) and _is_gray(reconstructed):
+            # Identical channels: SSIM of one channel equals the channel mean
+            original, reconstructed = original[..., 0], reconstructed[..., 0]
+        else:
+            kw['channel_axis'] = -1  # colour: average the per-channel SSIMs
+    ssim = compute_ssim(
+        original.astype(np.uint8, copy=False),
+        reconstructed.astype(np.uint8, copy=False), **kw)
+    return psnr, ssim
@@ -10,9 +10,11 @@ Cada função replica exatamente a aritmética inteira do código C:
 NOTA: Sem deblocking — o C não faz deblocking.
 """
 
+from functools import lru_cache
+
 import numpy as np
-from dct import dct_2d, idct_2d
-from constantes import TYPE, Q50_LUMA, Q50_CHROMA
+from dct import dct_2d_batch, idct_2d_batch
+from constantes import TYPE, Q50_LUMA, Q50_CHROMA, ZIGZAG_SCAN
 
 
 # =====================================================================
@@ -24,10 +26,16 @@ def _c_div_vec(a, b):
 
     np.int32/int64 floor division in Python rounds toward -∞.
     C integer division truncates toward zero.
+
+    Branchless: biasing negative numerators by (b - 1) turns the floor
+    division into a truncating one, with a single temporary array.
     """
-    a = np.asarray(a, dtype=np.int64)
-    result = np.where(a >= 0, a // b, -((-a) // b))
-    return result.astype(np.int32)
+    a = np.asarray(a)
+    t = a >> (8 * a.itemsize - 1)   # -1 where a < 0, else 0
+    t &= b - 1
+    t += a
+    t //= b
+    return t.astype(np.int32, copy=False)
 
 
 # =====================================================================
@@ -37,6 +45,8 @@ def _c_div_vec(a, b):
 # Row norms * 1024:  sqrt(8)=2896, sqrt(6)=2508, sqrt(4)=2048
 _APPROX_NORM_1024 = np.array([2896, 2508, 2048, 2508, 2896, 2508, 2048, 2508],
                               dtype=np.int64)
+# n = norm[i] * norm[j] for every flat index i*8+j
+_APPROX_NORM_2D = np.outer(_APPROX_NORM_1024, _APPROX_NORM_1024).reshape(64)
 
 
 def apply_approx_norm_correction(quant_table_flat):
@@ -49,22 +59,37 @@ def apply_approx_norm_correction(quant_table_flat):
 
     Returns a *new* int32 flat array (64,).
     """
-    qt = np.asarray(quant_table_flat, dtype=np.int64).flatten().copy()
-    for i in range(8):
-        for j in range(8):
-            n = _APPROX_NORM_1024[i] * _APPROX_NORM_1024[j]
-            scaled = (qt[i * 8 + j] * n + 524288) // 1048576
-            qt[i * 8 + j] = max(scaled, 1)
-    return qt.astype(np.int32)
+    qt = np.asarray(quant_table_flat, dtype=np.int64).reshape(64)
+    scaled = (qt * _APPROX_NORM_2D + 524288) // 1048576
+    return np.maximum(scaled, 1).astype(np.int32)
 
 
 # =====================================================================
 #  Color space conversion — matching colorspace.c
 # =====================================================================
 
-def rgb_to_ycbcr(r, g, b):
+# BT.601 integer matrices from colorspace.c, applied to all channels in one
+# einsum pass. int32 is enough: |sum| <= 1000*255 + 500.
+_RGB_TO_YCBCR = np.array([
+    [ 299,  587,  114],
+    [-169, -331,  500],
+    [ 500, -419,  -81],
+], dtype=np.int32)
+
+# ycbcr_to_rgb rounds each offset before applying its sign (G is subtracted)
+_CBCR_TO_RGB = np.array([
+    [   0, 1402],
+    [ 344,  714],
+    [1772,    0],
+], dtype=np.int32)
+_CBCR_TO_RGB_SIGN = np.array([1, -1, 1], dtype=np.int32)
+
+
+def rgb_to_ycbcr(rgb):
     """RGB → YCbCr (BT.601), matching C's rgb_to_ycbcr_batch exactly.
 
+    Takes the interleaved (H, W, 3) uint8 image, as C's rgb buffer.
+
     C:
         *y++  = ((299*r + 587*g + 114*b + 500) / 1000) - 128;
         *cb++ = ((-169*r - 331*g + 500*b + 500) / 1000);
@@ -73,15 +98,17 @@ def rgb_to_ycbcr(r, g, b):
     Note: Y is level-shifted by -128 inside colorspace (not in block processing).
     Cb, Cr are centered at 0.
     """
-    r = np.asarray(r, dtype=np.int64)
-    g = np.asarray(g, dtype=np.int64)
-    b = np.asarray(b, dtype=np.int64)
-
-    y  = _c_div_vec(299*r + 587*g + 114*b + 500, 1000) - 128
-    cb = _c_div_vec(-169*r - 331*g + 500*b + 500, 1000)
-    cr = _c_div_vec(500*r - 419*g - 81*b + 500, 1000)
+    # One strided copy to C-ordered (3, H, W) planes
+    planes = np.moveaxis(np.asarray(rgb), -1, 0).astype(np.int32, order='C')
+    ycc = np.einsum('kc,c...->k...', _RGB_TO_YCBCR, planes)
+    ycc += 500  # in place: the einsum output is the only full-size buffer
+    # Y - 128 lies in [-128, 127] but Cb/Cr in [-127, 128] (pure blue/red
+    # give 128), so int8 is too small; int16 still halves the channel size
+    # for block extraction and the forward DCT
+    y, cb, cr = _c_div_vec(ycc, 1000).astype(np.int16)
+    y -= 128
 
-    return y.astype(np.int32), cb.astype(np.int32), cr.astype(np.int32)
+    return y, cb, cr
 
 
 def ycbcr_to_rgb(y, cb, cr):
@@ -93,16 +120,19 @@ def ycbcr_to_rgb(y, cb, cr):
         int32_t g  = yv - (344 * cbv + 714 * crv + 500) / 1000;
         int32_t bv = yv + (1772 * cbv + 500) / 1000;
     """
-    yv  = np.asarray(y, dtype=np.int64) + 128
-    cbv = np.asarray(cb, dtype=np.int64)
-    crv = np.asarray(cr, dtype=np.int64)
+    cbcr = np.stack([cb, cr]).astype(np.int32)
+    offs = np.einsum('kc,c...->...k', _CBCR_TO_RGB, cbcr)
+    offs += 500
+    out = _c_div_vec(offs, 1000)
 
-    r = yv + _c_div_vec(1402 * crv + 500, 1000)
-    g = yv - _c_div_vec(344 * cbv + 714 * crv + 500, 1000)
-    b = yv + _c_div_vec(1772 * cbv + 500, 1000)
-
-    out = np.stack([r, g, b], axis=-1)
-    return np.clip(out, 0, 255).astype(np.uint8)
+    # Sign and + Y + 128 update the same (H, W, 3) buffer; the clip writes
+    # straight into the uint8 result (values are in range, cast is exact)
+    out *= _CBCR_TO_RGB_SIGN
+    out += np.asarray(y, dtype=np.int32)[..., None]
+    out += 128
+    rgb = np.empty(out.shape, dtype=np.uint8)
+    np.clip(out, 0, 255, out=rgb, casting='unsafe')
+    return rgb
 
 
 # =====================================================================
@@ -117,12 +147,36 @@ def scale_quant_table(base_flat, k):
         scaled = (base[i] * k_fixed) >> 10;
         if (scaled < 1) scaled = 1;
     """
-    base = np.asarray(base_flat, dtype=np.int64).flatten()
+    base = np.asarray(base_flat, dtype=np.int64).reshape(64)
     k_fixed = int(k * 1024)
     scaled = (base * k_fixed) >> 10
     return np.clip(scaled, 1, None).astype(np.int32)
 
 
+def prepare_quant_table(quant_table_flat, k_factor, is_approx=False):
+    """Table actually used by the codec for one k: scale_quant_table, plus
+    apply_approx_norm_correction for the approximate DCT.
+
+    Memoized on (table, k_fixed, is_approx): the k sweep asks for the same
+    few tables for every channel and image. The result is read-only.
+
+    Returns: int32 flat array (64,)
+    """
+    base = np.asarray(quant_table_flat, dtype=np.int32).reshape(64)
+    return _prepared_table(base.tobytes(), int(k_factor * 1024), is_approx)
+
+
+@lru_cache(maxsize=None)
+def _prepared_table(base_bytes, k_fixed, is_approx):
+    base = np.frombuffer(base_bytes, dtype=np.int32)
+    # k_fixed / 1024 is exact, so scale_quant_table sees the same k_fixed
+    qt = scale_quant_table(base, k_fixed / 1024)
+    if is_approx:
+        qt = apply_approx_norm_correction(qt)
+    qt.setflags(write=False)
+    return qt
+
+
 RECIP_SHIFT = 16
 
 
@@ -133,11 +187,25 @@ def _compute_reciprocal_table(qt_flat):
     """
     qt = np.asarray(qt_flat, dtype=np.int64)
     qt = np.where(qt == 0, 1, qt)
-    return (((1 << RECIP_SHIFT) + qt // 2) // qt).astype(np.int64)
+    return ((1 << RECIP_SHIFT) + qt // 2) // qt
+
+
+@lru_cache(maxsize=None)
+def _quant_constants(qt_bytes):
+    """(qt/2, recip) int64 rows for an int32 quantization table, computed
+    once per distinct table (quantize runs for every channel and k)."""
+    qt = np.frombuffer(qt_bytes, dtype=np.int32).astype(np.int64)
+    half = qt >> 1
+    recip = _compute_reciprocal_table(qt)
+    half.setflags(write=False)
+    recip.setflags(write=False)
+    return half, recip
 
 
 def quantize(dct_block_flat, quant_table_flat):
-    """Quantize a 64-element block, matching C's quantize_fast exactly.
+    """Quantize a 64-element block (any shape, e.g. (64,) or (8, 8)) or a
+    (N, 64) stack of blocks, matching C's quantize_fast exactly. The result
+    has the input's shape.
 
     C uses reciprocal multiplication for speed (same as ESP32):
         recip = ((1 << 16) + qt/2) / qt
@@ -146,28 +214,43 @@ def quantize(dct_block_flat, quant_table_flat):
         else
             output = -(((−dct + qt/2) * recip) >> 16)
     """
-    dct = np.asarray(dct_block_flat, dtype=np.int64).flatten()
-    qt  = np.asarray(quant_table_flat, dtype=np.int64).flatten()
-    qt  = np.where(qt == 0, 1, qt)
-    recip = _compute_reciprocal_table(qt)
-
-    abs_dct = np.abs(dct)
-    half = qt >> 1
-    val = abs_dct + half
-    magnitude = (val * recip) >> RECIP_SHIFT
-
-    result = np.where(dct >= 0, magnitude, -magnitude)
-    return result.astype(np.int32)
+    dct = np.asarray(dct_block_flat)
+    if not np.issubdtype(dct.dtype, np.integer):
+        # Same cast as before (truncating floats); integer input is used
+        # as-is, which the sign trick below relies on
+        dct = dct.astype(np.int64)
+    shape = dct.shape
+    dct = dct.reshape(-1, 64)
+    # Tables from prepare_quant_table are int32 already: no per-call copy
+    qt  = np.asarray(quant_table_flat, dtype=np.int32).reshape(64)
+    half, recip = _quant_constants(qt.tobytes())
+
+    # One int64 temporary, updated in place (qt == 0 gives half == 0 as C);
+    # the product needs int64 exactly like C's (int64_t) cast
+    magnitude = np.abs(dct, dtype=np.int64)
+    magnitude += half
+    magnitude *= recip
+    magnitude >>= RECIP_SHIFT
+    out = magnitude.astype(np.int32)
+
+    # Branchless sign restore: s = -1 where dct < 0, and (m ^ s) - s == -m
+    sign = (dct >> (8 * dct.itemsize - 1)).astype(np.int32, copy=False)
+    out ^= sign
+    out -= sign
+    return out.reshape(shape)
 
 
 def dequantize(quant_block_flat, quant_table_flat):
     """Dequantize: simple multiply, matching C's dequantize.
 
+    Accepts a 64-element block (any shape) or a (N, 64) stack of blocks;
+    the result has the input's shape.
+
     C:  output[i] = quant_block[i] * quant_table[i];
     """
-    q  = np.asarray(quant_block_flat, dtype=np.int64).flatten()
-    qt = np.asarray(quant_table_flat, dtype=np.int64).flatten()
-    return (q * qt).astype(np.int32)
+    q  = np.asarray(quant_block_flat, dtype=np.int32)
+    qt = np.asarray(quant_table_flat, dtype=np.int32).reshape(64)
+    return (q.reshape(-1, 64) * qt).reshape(q.shape)
 
 
 # =====================================================================
@@ -175,27 +258,27 @@ def dequantize(quant_block_flat, quant_table_flat):
 # =====================================================================
 
 def extract_blocks(channel, width, height):
-    """Extract 8×8 blocks from a (height, width) int32 channel.
+    """Extract 8×8 blocks from a (height, width) integer channel.
 
     Matches C's extract_blocks: zero-padding for edge blocks.
 
-    Returns: blocks (N, 8, 8) int32, num_blocks int
+    Returns: blocks (N, 8, 8) with the channel's dtype (int16 from
+    rgb_to_ycbcr; the DCT kernels widen to int64), num_blocks int
     """
-    channel = np.asarray(channel, dtype=np.int32)
+    channel = np.asarray(channel)
     bx = (width + 7) // 8
     by = (height + 7) // 8
     num_blocks = bx * by
 
-    blocks = np.zeros((num_blocks, 8, 8), dtype=np.int32)
+    # Zero-pad to whole blocks only when the size is not a multiple of 8
+    if width % 8 or height % 8:
+        padded = np.zeros((by * 8, bx * 8), dtype=channel.dtype)
+        padded[:height, :width] = channel
+    else:
+        padded = channel
 
-    for j in range(by):
-        for i in range(bx):
-            y0 = j * 8
-            x0 = i * 8
-            h_copy = min(8, height - y0)
-            w_copy = min(8, width - x0)
-            idx = j * bx + i
-            blocks[idx, :h_copy, :w_copy] = channel[y0:y0+h_copy, x0:x0+w_copy]
+    # Raster block order (idx = j * bx + i), one strided copy
+    blocks = padded.reshape(by, 8, bx, 8).swapaxes(1, 2).reshape(num_blocks, 8, 8)
 
     return blocks, num_blocks
 
@@ -206,47 +289,42 @@ def reconstruct_channel(blocks, num_blocks, width, height):
     Matches C's reconstruct_channel.
     """
     bx = (width + 7) // 8
-    channel = np.zeros((height, width), dtype=np.int32)
+    by = (height + 7) // 8
 
-    for j in range((height + 7) // 8):
-        for i in range(bx):
-            y0 = j * 8
-            x0 = i * 8
-            h_copy = min(8, height - y0)
-            w_copy = min(8, width - x0)
-            idx = j * bx + i
-            channel[y0:y0+h_copy, x0:x0+w_copy] = blocks[idx, :h_copy, :w_copy]
+    # (by, bx, 8, 8) view of the raster-ordered stack → one copy back to pixels,
+    # then drop the zero padding of the edge blocks
+    blocks4d = np.asarray(blocks, dtype=np.int32).reshape(by, bx, 8, 8)
+    channel = blocks4d.swapaxes(1, 2).reshape(by * 8, bx * 8)
 
-    return channel
+    return channel[:height, :width]
 
 
 # =====================================================================
 #  Full compress / decompress pipeline — matching codec.c
 # =====================================================================
 
-def process_channel_compress(channel, quant_table_flat, k_factor, dct_1d_func,
-                             is_approx=False):
-    """Compress one channel: extract → DCT → quantize.
+def forward_dct_blocks(channel, dct_1d_func):
+    """Extract → DCT for one channel. Independent of k, so callers sweeping
+    several k factors can compute it once and reuse it.
 
-    Returns: quantized_blocks (N, 64), dct_blocks (N, 64), num_blocks
+    Returns: dct_blocks (N, 64) int32, num_blocks
     """
     h, w = channel.shape
     blocks, num_blocks = extract_blocks(channel, w, h)
-    qt = scale_quant_table(quant_table_flat, k_factor)
-    if is_approx:
-        qt = apply_approx_norm_correction(qt)
+    dct_all = dct_2d_batch(blocks, dct_1d_func).reshape(num_blocks, 64)
+    return dct_all, num_blocks
+
 
-    quantized_all = np.zeros((num_blocks, 64), dtype=np.int32)
-    dct_all       = np.zeros((num_blocks, 64), dtype=np.int32)
+def process_channel_compress(channel, quant_table_flat, k_factor, dct_1d_func,
+                             is_approx=False):
+    """Compress one channel: extract → DCT → quantize.
 
-    for b in range(num_blocks):
-        blk = blocks[b].astype(np.int32)
-        dct_block = dct_2d(blk, dct_1d_func)
-        dct_flat  = dct_block.flatten()
-        q_flat    = quantize(dct_flat, qt)
+    Returns: quantized_blocks (N, 64), dct_blocks (N, 64), num_blocks
+    """
+    dct_all, num_blocks = forward_dct_blocks(channel, dct_1d_func)
+    qt = prepare_quant_table(quant_table_flat, k_factor, is_approx)
 
-        dct_all[b]       = dct_flat
-        quantized_all[b] = q_flat
+    quantized_all = quantize(dct_all, qt)
 
     return quantized_all, dct_all, num_blocks
 
@@ -258,23 +336,38 @@ def process_channel_decompress(quantized_blocks, num_blocks, width, height,
 
     Returns: channel (height, width) int32
     """
-    qt = scale_quant_table(quant_table_flat, k_factor)
-    if is_approx:
-        qt = apply_approx_norm_correction(qt)
-    idct_blocks = np.zeros((num_blocks, 8, 8), dtype=np.int32)
+    qt = prepare_quant_table(quant_table_flat, k_factor, is_approx)
 
-    for b in range(num_blocks):
-        if is_identity:
-            idct_blocks[b] = quantized_blocks[b].reshape(8, 8)
-        else:
-            deq = dequantize(quantized_blocks[b], qt)
-            blk_idct = idct_2d(deq.reshape(8, 8), idct_1d_func)
-            idct_blocks[b] = blk_idct.astype(np.int32)
+    if is_identity:
+        idct_blocks = np.asarray(quantized_blocks, dtype=np.int32).reshape(
+            num_blocks, 8, 8)
+    else:
+        deq_all = dequantize(quantized_blocks, qt)
+        idct_blocks = idct_2d_batch(deq_all.reshape(num_blocks, 8, 8),
+                                    idct_1d_func)
 
     channel = reconstruct_channel(idct_blocks, num_blocks, width, height)
     return channel
 
 
+def reconstruct_from_dct(dct_blocks, num_blocks, width, height,
+                         quant_table_flat, k_factor, idct_1d_func,
+                         is_identity=False, is_approx=False):
+    """Quantize → decompress precomputed DCT blocks (see forward_dct_blocks).
+
+    Returns: reconstructed channel (H, W) int32, quantized_blocks (N, 64) int32
+    """
+    qt = prepare_quant_table(quant_table_flat, k_factor, is_approx)
+    quantized = quantize(dct_blocks, qt)
+
+    recon = process_channel_decompress(
+        quantized, num_blocks, width, height,
+        quant_table_flat, k_factor, idct_1d_func, is_identity,
+        is_approx=is_approx)
+
+    return recon, quantized
+
+
 def process_channel(channel_image, quant_table_flat, k_factor,
                     dct_1d_func, idct_1d_func, is_identity=False,
                     is_approx=False):
@@ -286,46 +379,75 @@ def process_channel(channel_image, quant_table_flat, k_factor,
     Returns: reconstructed channel (H, W) int32, quantized_blocks (N, 64) int32
     """
     h, w = channel_image.shape
+    dct_all, num_blocks = forward_dct_blocks(channel_image, dct_1d_func)
+    return reconstruct_from_dct(dct_all, num_blocks, w, h,
+                                quant_table_flat, k_factor, idct_1d_func,
+                                is_identity, is_approx=is_approx)
 
-    # Compress
-    quantized, _, num_blocks = process_channel_compress(
-        channel_image, quant_table_flat, k_factor, dct_1d_func,
-        is_approx=is_approx)
 
-    # Decompress
-    recon = process_channel_decompress(
-        quantized, num_blocks, w, h,
-        quant_table_flat, k_factor, idct_1d_func, is_identity,
-        is_approx=is_approx)
+def forward_dct_planes(planes, dct_1d_func):
+    """forward_dct_blocks for a (P, H, W) stack of equally sized planes
+    (Y, Cb, Cr), run as a single (P*N, 8, 8) batched DCT.
 
-    return recon, quantized
+    Returns: dct_blocks (P, N, 64) int32, num_blocks (per plane)
+    """
+    _, h, w = planes.shape
+    blocks = [extract_blocks(plane, w, h)[0] for plane in planes]
+    num_blocks = blocks[0].shape[0]
+    dct_all = dct_2d_batch(np.concatenate(blocks), dct_1d_func)
+    return dct_all.reshape(len(blocks), num_blocks, 64), num_blocks
+
+
+def reconstruct_planes_from_dct(dct_planes, num_blocks, width, height,
+                                scaled_tables, idct_1d_func, is_identity=False):
+    """reconstruct_from_dct for every plane of forward_dct_planes, with one
+    quantization table per plane and a single batched IDCT.
+
+    scaled_tables are the final per-plane tables (see prepare_quant_table),
+    so callers sweeping k can build them all once up-front.
+
+    Returns: list of channels (H, W) int32, quantized_blocks (P, N, 64) int32
+    """
+    qts = scaled_tables
+    quantized = np.stack([quantize(d, qt) for d, qt in zip(dct_planes, qts)])
+
+    if is_identity:
+        idct_all = quantized.reshape(-1, 8, 8)
+    else:
+        deq_all = np.stack([dequantize(q, qt) for q, qt in zip(quantized, qts)])
+        idct_all = idct_2d_batch(deq_all.reshape(-1, 8, 8), idct_1d_func)
+
+    idct_planes = idct_all.reshape(len(qts), num_blocks, 8, 8)
+    channels = [reconstruct_channel(b, num_blocks, width, height)
+                for b in idct_planes]
+    return channels, quantized
 
 
 # =====================================================================
 #  Bitrate estimation — matching C's zigzag-based heuristic
 # =====================================================================
 
+# Scan order as an index array (intp: no per-call conversion when gathering)
+_ZIGZAG = ZIGZAG_SCAN.astype(np.intp)
+
+
 def compute_bitrate(quantized_blocks):
     """Compute bitrate (bpp) from quantized blocks using zigzag last-nonzero.
 
     Matches the C-side bitrate computation (metrics.c) exactly.
     Uses ZIGZAG_SCAN (scan_position → flat_index).
     """
-    from constantes import ZIGZAG_SCAN
-
-    total_bits = 0.0
-    num_blocks = quantized_blocks.shape[0]
+    flat = np.asarray(quantized_blocks).reshape(-1, 64)
+    num_blocks = flat.shape[0]
+    # All-zero blocks cost no bits (common at high k): drop them before the
+    # zigzag gather
+    flat = flat[(flat != 0).any(axis=1)]
 
-    for i in range(num_blocks):
-        flat = quantized_blocks[i].flatten()
-        last_nz = -1
-        for idx in range(63, -1, -1):
-            if flat[ZIGZAG_SCAN[idx]] != 0:
-                last_nz = idx
-                break
+    # Nonzero mask in zigzag order; last nonzero = first hit from the end
+    nz = flat[:, _ZIGZAG] != 0
+    last_nz = 63 - np.argmax(nz[:, ::-1], axis=1)
 
-        if last_nz >= 0:
-            total_bits += (last_nz + 1) * 8.0
+    total_bits = float(np.sum(last_nz + 1)) * 8.0
 
     total_pixels = num_blocks * 64
     bpp = total_bits / total_pixels if total_pixels > 0 else 0.0
@@ -1,48 +1,45 @@
 """
-plots.py — Métricas de qualidade e plotagem de resultados.
+plots.py — Plotagem e relatórios de resultados (métricas em metrics.py).
 """
 
 import os
-import numpy as np
-import matplotlib.pyplot as plt
-from skimage.metrics import peak_signal_noise_ratio as compute_psnr
-from skimage.metrics import structural_similarity as compute_ssim
-
+from concurrent.futures import ProcessPoolExecutor
 
-def quality_metrics(original, reconstructed):
-    psnr = compute_psnr(original, reconstructed, data_range=255)
-    ssim = compute_ssim(
-        original.astype(np.uint8), reconstructed.astype(np.uint8),
-        channel_axis=-1, data_range=255, win_size=7)
-    return psnr, ssim
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to files, never shown
+import matplotlib.pyplot as plt
 
+# Background writers for per-image figures (see submit_plot / wait_plots)
+_PLOT_EXECUTOR = None
+_PENDING_PLOTS = []
 
-def compute_bitrate(quantized_blocks):
-    """Bitrate via zigzag last-nonzero, matching C's metrics.c exactly.
 
-    Uses ZIGZAG_SCAN (scan_position → flat_index), the standard JPEG
-    zigzag order.  block[ZIGZAG_SCAN[i]] gives the i-th coefficient
-    in zigzag scan order (DC first, highest frequency last).
-    """
-    from constantes import ZIGZAG_SCAN
+def submit_plot(plot_func, *args, **kwargs):
+    """Run a plot_* function in a worker process so savefig overlaps with the
+    next image's processing. Only the plain results lists/strings are sent."""
+    global _PLOT_EXECUTOR
+    if _PLOT_EXECUTOR is None:
+        _PLOT_EXECUTOR = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    _PENDING_PLOTS.append(_PLOT_EXECUTOR.submit(plot_func, *args, **kwargs))
 
-    total_bits = 0.0
-    num_blocks = quantized_blocks.shape[0]
 
-    for i in range(num_blocks):
-        flat = quantized_blocks[i].flatten()
-        last_nz = -1
-        for idx in range(63, -1, -1):
-            if flat[ZIGZAG_SCAN[idx]] != 0:
-                last_nz = idx
-                break
+def wait_plots():
+    """Wait for every submitted plot (re-raising worker errors) and stop the pool."""
+    global _PLOT_EXECUTOR
+    for future in _PENDING_PLOTS:
+        future.result()
+    _PENDING_PLOTS.clear()
+    if _PLOT_EXECUTOR is not None:
+        _PLOT_EXECUTOR.shutdown()
+        _PLOT_EXECUTOR = None
 
-        if last_nz >= 0:
-            total_bits += (last_nz + 1) * 8.0
 
-    total_pixels = num_blocks * 64
-    bpp = total_bits / total_pixels if total_pixels > 0 else 0.0
-    return {'bpp_amplitude': bpp}
+def _image_subdir(out_dir, image_name):
+    """Return (stem, out_dir/stem) for an image, creating the directory."""
+    name = os.path.basename(image_name).split('.')[0]
+    sub = os.path.join(out_dir, name)
+    os.makedirs(sub, exist_ok=True)
+    return name, sub
 
 
 def results_table(results, total_time, image_name, directory):
@@ -72,9 +69,10 @@ def results_table(results, total_time, image_name, directory):
     ax.text(0.5, -0.1,
             f"Tempo total: {total_time:.2f} ms | {total_time_s:.2f} s | {total_time_min:.2f} min",
             ha='center', va='center', fontsize=10, transform=ax.transAxes)
-    plt.tight_layout()
+    # Layout once here instead of bbox_inches='tight' (which renders twice)
+    fig.tight_layout()
     outfile = os.path.join(directory, 'results_table.png')
-    fig.savefig(outfile, bbox_inches='tight', dpi=200)
+    fig.savefig(outfile, dpi=120)
     plt.close(fig)
 
 
@@ -95,14 +93,9 @@ def print_results(results, total_time, image_name, output_dir=None, plot_dir=Non
     output_str = "\n".join(lines)
     print(output_str)
     target_dir = None
-    if plot_dir:
-        target_dir = os.path.join(plot_dir, os.path.basename(image_name).split('.')[0])
-        os.makedirs(target_dir, exist_ok=True)
-        with open(os.path.join(target_dir, 'results.txt'), 'w', encoding='utf-8') as f:
-            f.write(output_str)
-    elif output_dir:
-        target_dir = os.path.join(output_dir, os.path.basename(image_name).split('.')[0])
-        os.makedirs(target_dir, exist_ok=True)
+    base_dir = plot_dir or output_dir
+    if base_dir:
+        _, target_dir = _image_subdir(base_dir, image_name)
         with open(os.path.join(target_dir, 'results.txt'), 'w', encoding='utf-8') as f:
             f.write(output_str)
     results_table(results, total_time, image_name, target_dir)
@@ -111,9 +104,7 @@ def print_results(results, total_time, image_name, output_dir=None, plot_dir=Non
 def plot_psnr(results, image_name, out_dir='plots'):
     ks = [r[0] for r in results]
     psnrs = [r[1] for r in results]
-    name = os.path.basename(image_name).split('.')[0]
-    sub = os.path.join(out_dir, name)
-    os.makedirs(sub, exist_ok=True)
+    name, sub = _image_subdir(out_dir, image_name)
     plt.figure(figsize=(8, 5))
     plt.plot(ks, psnrs, marker='o')
     plt.xlabel('k factor')
@@ -127,9 +118,7 @@ def plot_psnr(results, image_name, out_dir='plots'):
 def plot_ssim(results, image_name, out_dir='plots'):
     ks = [r[0] for r in results]
     ssims = [r[2] for r in results]
-    name = os.path.basename(image_name).split('.')[0]
-    sub = os.path.join(out_dir, name)
-    os.makedirs(sub, exist_ok=True)
+    name, sub = _image_subdir(out_dir, image_name)
     plt.figure(figsize=(8, 5))
     plt.plot(ks, ssims, marker='o')
     plt.xlabel('k factor')
@@ -143,9 +132,7 @@ def plot_ssim(results, image_name, out_dir='plots'):
 def plot_bitrate(bitrate_list, image_name, out_dir='plots'):
     ks = [b[0] for b in bitrate_list]
     bpp_amp = [b[1]['bpp_amplitude'] for b in bitrate_list]
-    name = os.path.basename(image_name).split('.')[0]
-    sub = os.path.join(out_dir, name)
-    os.makedirs(sub, exist_ok=True)
+    name, sub = _image_subdir(out_dir, image_name)
     plt.figure(figsize=(8, 5))
     plt.plot(ks, bpp_amp, marker='o', label='Bitrate', linewidth=2)
     plt.xlabel('k factor', fontsize=11)
@@ -155,7 +142,8 @@ def plot_bitrate(bitrate_list, image_name, out_dir='plots'):
     plt.ylim(0, 8.5)
     plt.legend()
     plt.grid(True, linestyle='--', alpha=0.6)
-    plt.savefig(os.path.join(sub, name + '_bitrate.png'), dpi=200, bbox_inches='tight')
+    plt.tight_layout()
+    plt.savefig(os.path.join(sub, name + '_bitrate.png'), dpi=120)
     plt.close()
 
 
@@ -167,9 +155,10 @@ def plot_dataset(results_global, bitrate_global, out_dir='plots'):
     df = pd.DataFrame(flat, columns=['k', 'PSNR', 'SSIM', 'Time', 'Image'])
     analysis = os.path.join(out_dir, '_dataset_analysis')
     os.makedirs(analysis, exist_ok=True)
-    unique_k = sorted(df['k'].unique())
-    mean_psnr = [df[df['k'] == k]['PSNR'].mean() for k in unique_k]
-    mean_ssim = [df[df['k'] == k]['SSIM'].mean() for k in unique_k]
+    means = df.groupby('k')[['PSNR', 'SSIM']].mean()  # one pass, sorted by k
+    unique_k = means.index.to_numpy()
+    mean_psnr = means['PSNR'].to_numpy()
+    mean_ssim = means['SSIM'].to_numpy()
 
     plt.figure(figsize=(8, 5))
     plt.plot(unique_k, mean_psnr, marker='o')
@@ -189,12 +178,12 @@ def plot_dataset(results_global, bitrate_global, out_dir='plots'):
 
     if bitrate_global:
         flat_bitrate = [item for sub in bitrate_global for item in sub]
-        dfb = pd.DataFrame(flat_bitrate, columns=['k', 'stats', 'Image'])
-        unique_k_b = sorted(dfb['k'].unique())
-        mean_bpp_amp = [
-            dfb[dfb['k'] == k]['stats'].apply(lambda x: x['bpp_amplitude']).mean()
-            for k in unique_k_b
-        ]
+        dfb = pd.DataFrame(
+            [(k, stats['bpp_amplitude']) for k, stats, _ in flat_bitrate],
+            columns=['k', 'bpp_amplitude'])
+        mean_bpp = dfb.groupby('k')['bpp_amplitude'].mean()
+        unique_k_b = mean_bpp.index.to_numpy()
+        mean_bpp_amp = mean_bpp.to_numpy()
         plt.figure(figsize=(8, 5))
         plt.plot(unique_k_b, mean_bpp_amp, marker='o', label='Bitrate', linewidth=2)
         plt.xlabel('k factor', fontsize=11)
@@ -204,6 +193,6 @@ def plot_dataset(results_global, bitrate_global, out_dir='plots'):
         plt.ylim(0, 8.5)
         plt.legend()
         plt.grid(True, linestyle='--', alpha=0.6)
-        plt.savefig(os.path.join(analysis, 'dataset_mean_bitrate.png'),
-                    dpi=200, bbox_inches='tight')
+        plt.tight_layout()
+        plt.savefig(os.path.join(analysis, 'dataset_mean_bitrate.png'), dpi=120)
         plt.close()